@@ -7,7 +7,8 @@ for extracurricular activities at Mergington High School.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
+import json
 import os
 from pathlib import Path
 
@@ -19,65 +20,99 @@ current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
           "static")), name="static")
 
-# In-memory activity database
+# In-memory activity database. Change participants only through
+# add_participant/remove_participant/set_participants: mutating it directly
+# bypasses the cached /activities response. Participants are kept as
+# insertion-ordered dict keys for O(1) membership checks.
 activities = {
     "Chess Club": {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": dict.fromkeys(["michael@mergington.edu", "daniel@mergington.edu"])
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": dict.fromkeys(["emma@mergington.edu", "sophia@mergington.edu"])
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": dict.fromkeys(["john@mergington.edu", "olivia@mergington.edu"])
     },
     "Basketball Team": {
         "description": "Join our competitive basketball team and participate in league games",
         "schedule": "Mondays and Wednesdays, 4:00 PM - 5:30 PM",
         "max_participants": 15,
-        "participants": ["alex@mergington.edu"]
+        "participants": dict.fromkeys(["alex@mergington.edu"])
     },
     "Tennis Club": {
         "description": "Learn tennis skills and compete in friendly matches",
         "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:00 PM",
         "max_participants": 10,
-        "participants": ["james@mergington.edu", "rachel@mergington.edu"]
+        "participants": dict.fromkeys(["james@mergington.edu", "rachel@mergington.edu"])
     },
     "Art Studio": {
         "description": "Explore painting, drawing, and mixed media techniques",
         "schedule": "Wednesdays and Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 18,
-        "participants": ["isabella@mergington.edu"]
+        "participants": dict.fromkeys(["isabella@mergington.edu"])
     },
     "Music Ensemble": {
         "description": "Perform in our school orchestra and chamber ensembles",
         "schedule": "Mondays and Thursdays, 4:30 PM - 5:30 PM",
         "max_participants": 25,
-        "participants": ["noah@mergington.edu", "ava@mergington.edu"]
+        "participants": dict.fromkeys(["noah@mergington.edu", "ava@mergington.edu"])
     },
     "Debate Team": {
         "description": "Develop public speaking and critical thinking skills through debate",
         "schedule": "Tuesdays, 3:30 PM - 5:00 PM",
         "max_participants": 16,
-        "participants": ["lucas@mergington.edu"]
+        "participants": dict.fromkeys(["lucas@mergington.edu"])
     },
     "Science Club": {
         "description": "Conduct experiments and explore advanced scientific concepts",
         "schedule": "Fridays, 4:00 PM - 5:30 PM",
         "max_participants": 22,
-        "participants": ["mia@mergington.edu", "ethan@mergington.edu"]
+        "participants": dict.fromkeys(["mia@mergington.edu", "ethan@mergington.edu"])
     }
 }
 
 
+# Cached JSON encoding of activities, keyed by a version bumped on every change
+_activities_version = 0
+_activities_cache = (None, b"")
+
+
+def _mark_activities_changed():
+    """Invalidate the cached /activities response after modifying activities"""
+    global _activities_version
+    _activities_version += 1
+
+
+def add_participant(activity_name, email):
+    """Add a student to an activity's participants"""
+    activities[activity_name]["participants"][email] = None
+    _mark_activities_changed()
+
+
+def remove_participant(activity_name, email):
+    """Remove a student from an activity's participants"""
+    del activities[activity_name]["participants"][email]
+    _mark_activities_changed()
+
+
+def set_participants(activity_name, emails):
+    """Replace an activity's participants, keeping the given order"""
+    participants = activities[activity_name]["participants"]
+    participants.clear()
+    participants.update(dict.fromkeys(emails))
+    _mark_activities_changed()
+
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/static/index.html")
@@ -85,7 +120,20 @@ def root():
 
 @app.get("/activities")
 def get_activities():
-    return activities
+    global _activities_cache
+    version, content = _activities_cache
+    current = _activities_version
+    if version != current:
+        # Store under the version read before encoding, so a change made
+        # meanwhile leaves the cache stale rather than hiding the change
+        payload = {
+            name: {**activity, "participants": list(activity["participants"])}
+            for name, activity in activities.items()
+        }
+        content = json.dumps(payload, ensure_ascii=False,
+                             separators=(",", ":")).encode("utf-8")
+        _activities_cache = (current, content)
+    return Response(content=content, media_type="application/json")
 
 
 @app.post("/activities/{activity_name}/signup")
@@ -103,7 +151,7 @@ def signup_for_activity(activity_name: str, email: str):
         raise HTTPException(status_code=400, detail="Student already signed up for this activity")
 
     # Add student
-    activity["participants"].append(email)
+    add_participant(activity_name, email)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
@@ -122,5 +170,5 @@ def unregister_from_activity(activity_name: str, email: str):
         raise HTTPException(status_code=400, detail="Student is not registered for this activity")
 
     # Remove student
-    activity["participants"].remove(email)
+    remove_participant(activity_name, email)
     return {"message": f"Unregistered {email} from {activity_name}"}
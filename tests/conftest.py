@@ -1,85 +1,42 @@
+import httpx
 import pytest
-import sys
-from pathlib import Path
 
-# Add src directory to path so we can import app
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from app import app, activities, set_participants
 
-from fastapi.testclient import TestClient
-from app import app
+# Snapshot of the initial participants, taken once before any test mutates them
+_ORIGINAL_PARTICIPANTS = {
+    name: tuple(activity["participants"]) for name, activity in activities.items()
+}
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run async tests on asyncio only"""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client(anyio_backend):
+    """Create an async test client for the FastAPI app, shared across the session"""
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport does not send lifespan events, so run startup and
+    # shutdown once around the whole session, as `with TestClient(app)` would
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            yield c
 
 
 @pytest.fixture
-def client():
-    """Create a test client for the FastAPI app"""
-    return TestClient(app)
+def activities_db():
+    """Provide direct access to the app's in-memory activities"""
+    return activities
 
 
 @pytest.fixture
 def reset_activities():
     """Reset activities to initial state after each test"""
-    from app import activities
-    
-    # Store original state
-    original_activities = {
-        "Chess Club": {
-            "description": "Learn strategies and compete in chess tournaments",
-            "schedule": "Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 12,
-            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
-        },
-        "Programming Class": {
-            "description": "Learn programming fundamentals and build software projects",
-            "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
-            "max_participants": 20,
-            "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
-        },
-        "Gym Class": {
-            "description": "Physical education and sports activities",
-            "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
-            "max_participants": 30,
-            "participants": ["john@mergington.edu", "olivia@mergington.edu"]
-        },
-        "Basketball Team": {
-            "description": "Join our competitive basketball team and participate in league games",
-            "schedule": "Mondays and Wednesdays, 4:00 PM - 5:30 PM",
-            "max_participants": 15,
-            "participants": ["alex@mergington.edu"]
-        },
-        "Tennis Club": {
-            "description": "Learn tennis skills and compete in friendly matches",
-            "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:00 PM",
-            "max_participants": 10,
-            "participants": ["james@mergington.edu", "rachel@mergington.edu"]
-        },
-        "Art Studio": {
-            "description": "Explore painting, drawing, and mixed media techniques",
-            "schedule": "Wednesdays and Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 18,
-            "participants": ["isabella@mergington.edu"]
-        },
-        "Music Ensemble": {
-            "description": "Perform in our school orchestra and chamber ensembles",
-            "schedule": "Mondays and Thursdays, 4:30 PM - 5:30 PM",
-            "max_participants": 25,
-            "participants": ["noah@mergington.edu", "ava@mergington.edu"]
-        },
-        "Debate Team": {
-            "description": "Develop public speaking and critical thinking skills through debate",
-            "schedule": "Tuesdays, 3:30 PM - 5:00 PM",
-            "max_participants": 16,
-            "participants": ["lucas@mergington.edu"]
-        },
-        "Science Club": {
-            "description": "Conduct experiments and explore advanced scientific concepts",
-            "schedule": "Fridays, 4:00 PM - 5:30 PM",
-            "max_participants": 22,
-            "participants": ["mia@mergington.edu", "ethan@mergington.edu"]
-        }
-    }
-    
     yield
-    
-    # Reset activities to original state
-    activities.clear()
-    activities.update(original_activities)
+
+    # Tests only mutate participants, so restore those in place
+    for name, participants in _ORIGINAL_PARTICIPANTS.items():
+        set_participants(name, participants)
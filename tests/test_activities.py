@@ -1,14 +1,50 @@
 import pytest
-from fastapi.testclient import TestClient
+from urllib.parse import quote
+
+from app import set_participants
+
+
+pytestmark = pytest.mark.anyio
+
+_REDIRECT_CODES = frozenset({301, 302, 307, 308})
+_ACTIVITY_FIELDS = frozenset({"description", "schedule", "max_participants", "participants"})
+
+
+def _endpoint(activity, action):
+    """Build a percent-encoded activity endpoint path"""
+    return f"/activities/{quote(activity)}/{action}"
+
+
+def _assert_response(response, status, *texts, key=None):
+    """Assert the response status, that the body has `key` and each text appears in it"""
+    assert response.status_code == status
+    content = response.content
+    if key is not None:
+        assert f'"{key}"'.encode() in content
+    for text in texts:
+        assert text.encode() in content
+
+
+def _with_endpoints(action, rows):
+    """Replace the activity leading each parametrize row with its encoded endpoint"""
+    return [(_endpoint(activity, action), *rest) for activity, *rest in rows]
+
+
+# Shared endpoint paths, so each endpoint is defined in one place
+_CHESS_SIGNUP = _endpoint("Chess Club", "signup")
+_CHESS_UNREGISTER = _endpoint("Chess Club", "unregister")
+_PROGRAMMING_SIGNUP = _endpoint("Programming Class", "signup")
+_ART_SIGNUP = _endpoint("Art Studio", "signup")
+_ART_UNREGISTER = _endpoint("Art Studio", "unregister")
 
 
 class TestGetActivities:
     """Tests for GET /activities endpoint"""
     
-    def test_get_activities_success(self, client):
+    async def test_get_activities_success(self, client):
         """Test that we can retrieve all activities"""
-        response = client.get("/activities")
-        assert response.status_code == 200
+        response = await client.get("/activities")
+        _assert_response(response, 200)
         
         data = response.json()
         assert isinstance(data, dict)
@@ -16,190 +52,183 @@ class TestGetActivities:
         assert "Programming Class" in data
         assert len(data) == 9  # Should have 9 activities
     
-    def test_activities_have_correct_structure(self, client):
+    async def test_activities_have_correct_structure(self, client):
         """Test that activities have the expected fields"""
-        response = client.get("/activities")
+        response = await client.get("/activities")
         activities = response.json()
         
         chess_club = activities["Chess Club"]
-        assert "description" in chess_club
-        assert "schedule" in chess_club
-        assert "max_participants" in chess_club
-        assert "participants" in chess_club
+        assert _ACTIVITY_FIELDS <= chess_club.keys()
         assert isinstance(chess_club["participants"], list)
     
-    def test_activities_have_initial_participants(self, client):
+    async def test_activities_have_initial_participants(self, client):
         """Test that activities have expected initial participants"""
-        response = client.get("/activities")
+        response = await client.get("/activities")
         activities = response.json()
         
-        assert "michael@mergington.edu" in activities["Chess Club"]["participants"]
-        assert "daniel@mergington.edu" in activities["Chess Club"]["participants"]
-        assert "emma@mergington.edu" in activities["Programming Class"]["participants"]
+        assert set(activities["Chess Club"]["participants"]) >= {
+            "michael@mergington.edu", "daniel@mergington.edu"
+        }
+        assert set(activities["Programming Class"]["participants"]) >= {
+            "emma@mergington.edu", "sophia@mergington.edu"
+        }
 
+    
+    async def test_activities_response_reflects_set_participants(self, client,
+                                                                 reset_activities):
+        """Test that a cached /activities response is refreshed after set_participants"""
+        before = await client.get("/activities")
+        assert before.json()["Chess Club"]["participants"] != ["reset@mergington.edu"]
+        
+        set_participants("Chess Club", ["reset@mergington.edu"])
+        
+        after = await client.get("/activities")
+        assert after.json()["Chess Club"]["participants"] == ["reset@mergington.edu"]
 
 class TestSignup:
     """Tests for POST /activities/{activity_name}/signup endpoint"""
     
-    def test_signup_new_student_success(self, client, reset_activities):
+    async def test_signup_new_student_success(self, client, reset_activities, activities_db):
         """Test that a new student can sign up for an activity"""
         email = "newstudent@mergington.edu"
-        activity = "Chess Club"
         
-        response = client.post(
-            f"/activities/{activity}/signup",
-            params={"email": email}
-        )
+        response = await client.post(_CHESS_SIGNUP, params={"email": email})
         
-        assert response.status_code == 200
-        data = response.json()
-        assert "message" in data
-        assert email in data["message"]
-        assert activity in data["message"]
+        _assert_response(response, 200, "Signed up", email, "Chess Club", key="message")
         
         # Verify student was actually added
-        activities_response = client.get("/activities")
-        activities = activities_response.json()
-        assert email in activities[activity]["participants"]
+        assert email in activities_db["Chess Club"]["participants"]
     
-    def test_signup_nonexistent_activity(self, client, reset_activities):
-        """Test that signing up for nonexistent activity returns 404"""
-        email = "student@mergington.edu"
-        activity = "Nonexistent Activity"
-        
-        response = client.post(
-            f"/activities/{activity}/signup",
-            params={"email": email}
-        )
-        
-        assert response.status_code == 404
-        data = response.json()
-        assert "Activity not found" in data["detail"]
+    @pytest.mark.parametrize(
+        "url,email,expected_status,expected_detail",
+        _with_endpoints("signup", [
+            ("Nonexistent Activity", "student@mergington.edu", 404, "Activity not found"),
+            ("Chess Club", "michael@mergington.edu", 400, "already signed up"),
+        ]),
+        ids=["nonexistent_activity", "duplicate_student"],
+    )
+    async def test_signup_rejected(self, client, reset_activities, url, email,
+                                   expected_status, expected_detail):
+        """Test that signups for unknown activities or duplicate students are rejected"""
+        response = await client.post(url, params={"email": email})
+        
+        _assert_response(response, expected_status, expected_detail, key="detail")
     
-    def test_signup_duplicate_student(self, client, reset_activities):
-        """Test that a student already signed up cannot sign up again"""
-        email = "michael@mergington.edu"  # Already in Chess Club
-        activity = "Chess Club"
+    async def test_activities_response_reflects_signup(self, client, reset_activities):
+        """Test that a cached /activities response is refreshed after a signup"""
+        email = "cached@mergington.edu"
+        
+        before = await client.get("/activities")
+        assert email not in before.json()["Chess Club"]["participants"]
         
-        response = client.post(
-            f"/activities/{activity}/signup",
+        response = await client.post(
+            _CHESS_SIGNUP,
             params={"email": email}
         )
+        _assert_response(response, 200, key="message")
         
-        assert response.status_code == 400
-        data = response.json()
-        assert "already signed up" in data["detail"]
+        after = await client.get("/activities")
+        assert email in after.json()["Chess Club"]["participants"]
     
-    def test_signup_multiple_activities(self, client, reset_activities):
+    @pytest.mark.slow
+    async def test_signup_multiple_activities(self, client, reset_activities, activities_db):
         """Test that a student can sign up for multiple different activities"""
         email = "versatile@mergington.edu"
         
         # Sign up for first activity
-        response1 = client.post(
-            "/activities/Chess Club/signup",
+        response1 = await client.post(
+            _CHESS_SIGNUP,
             params={"email": email}
         )
-        assert response1.status_code == 200
+        _assert_response(response1, 200, key="message")
         
         # Sign up for second activity
-        response2 = client.post(
-            "/activities/Programming Class/signup",
+        response2 = await client.post(
+            _PROGRAMMING_SIGNUP,
             params={"email": email}
         )
-        assert response2.status_code == 200
+        _assert_response(response2, 200, key="message")
         
         # Verify student is in both activities
-        activities_response = client.get("/activities")
-        activities = activities_response.json()
-        assert email in activities["Chess Club"]["participants"]
-        assert email in activities["Programming Class"]["participants"]
+        assert email in activities_db["Chess Club"]["participants"]
+        assert email in activities_db["Programming Class"]["participants"]
 
 
 class TestUnregister:
     """Tests for DELETE /activities/{activity_name}/unregister endpoint"""
     
-    def test_unregister_existing_student_success(self, client, reset_activities):
+    async def test_unregister_existing_student_success(self, client, reset_activities,
+                                                       activities_db):
         """Test that a registered student can be unregistered"""
         email = "michael@mergington.edu"  # Already in Chess Club
-        activity = "Chess Club"
         
-        response = client.delete(
-            f"/activities/{activity}/unregister",
-            params={"email": email}
-        )
+        response = await client.delete(_CHESS_UNREGISTER, params={"email": email})
         
-        assert response.status_code == 200
-        data = response.json()
-        assert "message" in data
-        assert email in data["message"]
-        assert activity in data["message"]
+        _assert_response(response, 200, "Unregistered", email, "Chess Club", key="message")
         
         # Verify student was actually removed
-        activities_response = client.get("/activities")
-        activities = activities_response.json()
-        assert email not in activities[activity]["participants"]
+        assert email not in activities_db["Chess Club"]["participants"]
     
-    def test_unregister_nonexistent_activity(self, client, reset_activities):
-        """Test that unregistering from nonexistent activity returns 404"""
-        email = "student@mergington.edu"
-        activity = "Nonexistent Activity"
-        
-        response = client.delete(
-            f"/activities/{activity}/unregister",
-            params={"email": email}
-        )
-        
-        assert response.status_code == 404
-        data = response.json()
-        assert "Activity not found" in data["detail"]
+    @pytest.mark.parametrize(
+        "url,email,expected_status,expected_detail",
+        _with_endpoints("unregister", [
+            ("Nonexistent Activity", "student@mergington.edu", 404, "Activity not found"),
+            ("Chess Club", "notstudent@mergington.edu", 400, "not registered"),
+        ]),
+        ids=["nonexistent_activity", "non_registered_student"],
+    )
+    async def test_unregister_rejected(self, client, reset_activities, url, email,
+                                       expected_status, expected_detail):
+        """Test that unregistering from unknown activities or as a non-member is rejected"""
+        response = await client.delete(url, params={"email": email})
+        
+        _assert_response(response, expected_status, expected_detail, key="detail")
     
-    def test_unregister_non_registered_student(self, client, reset_activities):
-        """Test that unregistering a non-registered student returns 400"""
-        email = "notstudent@mergington.edu"
-        activity = "Chess Club"
+    async def test_activities_response_reflects_unregister(self, client, reset_activities):
+        """Test that a cached /activities response is refreshed after an unregister"""
+        email = "michael@mergington.edu"  # Already in Chess Club
         
-        response = client.delete(
-            f"/activities/{activity}/unregister",
-            params={"email": email}
-        )
+        before = await client.get("/activities")
+        assert email in before.json()["Chess Club"]["participants"]
         
-        assert response.status_code == 400
-        data = response.json()
-        assert "not registered" in data["detail"]
+        response = await client.delete(_CHESS_UNREGISTER, params={"email": email})
+        _assert_response(response, 200, key="message")
+        
+        after = await client.get("/activities")
+        assert email not in after.json()["Chess Club"]["participants"]
     
-    def test_signup_then_unregister(self, client, reset_activities):
+    @pytest.mark.slow
+    async def test_signup_then_unregister(self, client, reset_activities, activities_db):
         """Test complete signup and unregister workflow"""
         email = "workflow@mergington.edu"
         activity = "Art Studio"
         
         # Sign up
-        signup_response = client.post(
-            f"/activities/{activity}/signup",
+        signup_response = await client.post(
+            _ART_SIGNUP,
             params={"email": email}
         )
-        assert signup_response.status_code == 200
+        _assert_response(signup_response, 200, key="message")
         
         # Verify signed up
-        activities_response = client.get("/activities")
-        assert email in activities_response.json()[activity]["participants"]
+        assert email in activities_db[activity]["participants"]
         
         # Unregister
-        unregister_response = client.delete(
-            f"/activities/{activity}/unregister",
+        unregister_response = await client.delete(
+            _ART_UNREGISTER,
             params={"email": email}
         )
-        assert unregister_response.status_code == 200
+        _assert_response(unregister_response, 200, key="message")
         
         # Verify unregistered
-        activities_response = client.get("/activities")
-        assert email not in activities_response.json()[activity]["participants"]
+        assert email not in activities_db[activity]["participants"]
 
 
 class TestRootEndpoint:
     """Tests for GET / endpoint"""
     
-    def test_root_redirects_to_static(self, client):
+    async def test_root_redirects_to_static(self, client):
         """Test that root endpoint redirects to static index"""
-        response = client.get("/", follow_redirects=False)
-        assert response.status_code in [301, 302, 307, 308]
+        response = await client.get("/", follow_redirects=False)
+        assert response.status_code in _REDIRECT_CODES
         assert "/static/index.html" in response.headers.get("location", "")